@@ -0,0 +1,295 @@
+import logging
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import requests
+
+from config import DATA_DIR
+from src import utils
+
+logger = logging.getLogger(__name__)
+
+# Провайдер курсов: (валюты, базовая валюта, начало, конец) -> таблица дата x валюта.
+# Значение — сколько единиц базовой валюты стоит 1 единица валюты.
+RateProvider = Callable[[List[str], str, datetime, datetime], pd.DataFrame]
+
+DateLike = Union[str, datetime, pd.Timestamp]
+
+# Курс старше этого срока не используется (выходные и праздники укладываются с запасом)
+MAX_RATE_AGE = pd.Timedelta(days=7)
+
+# API отдаёт историю не больше чем за год — длинные периоды запрашиваются частями
+MAX_FETCH_DAYS = 365
+
+# Через сколько секунд повторять неудачный запрос курсов
+FAILED_FETCH_RETRY = 600.0
+
+
+def _empty_rates(currencies: Optional[List[str]] = None) -> pd.DataFrame:
+    return pd.DataFrame(columns=currencies or [], index=pd.DatetimeIndex([], name="date"), dtype=float)
+
+
+def fetch_rate_history(
+        currencies: List[str],
+        base: str,
+        start: datetime,
+        end: datetime,
+        settings: Optional[Dict[str, Any]] = None,
+) -> pd.DataFrame:
+    """Запрашивает дневные курсы за период одним запросом к API (период — не больше MAX_FETCH_DAYS)."""
+    settings = settings or utils.load_user_settings()
+    api_conf = settings.get("exchange_api", {})
+    if not isinstance(api_conf, dict):
+        api_conf = {}
+    url = api_conf.get("history_url", "https://api.exchangerate.host/timeseries")
+
+    logger.info("Requesting currency rate history for %s from %s to %s", currencies, start, end)
+    params = {
+        "base": base,
+        "symbols": ",".join(currencies),
+        "start_date": pd.Timestamp(start).strftime("%Y-%m-%d"),
+        "end_date": pd.Timestamp(end).strftime("%Y-%m-%d"),
+    }
+    try:
+        resp = requests.get(url, params=params)
+        resp.raise_for_status()
+        data = resp.json()
+        rates = data.get("rates", {})
+        table = pd.DataFrame.from_dict(rates, orient="index", dtype=float).reindex(columns=currencies)
+        table.index = pd.to_datetime(table.index)
+        table.index.name = "date"
+        # API отдаёт количество валюты за 1 единицу базовой — переворачиваем
+        return (1.0 / table.replace(0, np.nan)).sort_index()
+    except Exception as e:
+        logger.exception("Failed to fetch currency rate history: %s", e)
+        return _empty_rates(currencies)
+
+
+def static_rate_provider(rates: Dict[str, float]) -> RateProvider:
+    """Локальный провайдер с постоянными курсами — для работы без сети и тестов."""
+
+    def provider(currencies: List[str], base: str, start: datetime, end: datetime) -> pd.DataFrame:
+        index = pd.date_range(pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize(), freq="D", name="date")
+        return pd.DataFrame({cur: float(rates[cur]) if cur in rates else np.nan for cur in currencies}, index=index)
+
+    return provider
+
+
+class RateStore:
+    """Локальная таблица дневных курсов (дата x валюта) к базовой валюте.
+
+    Недостающие дни догружаются у провайдера частями не длиннее MAX_FETCH_DAYS и сохраняются в CSV.
+    Успешно запрошенные периоды больше не запрашиваются, неудачные — повторяются через retry_after секунд.
+    """
+
+    def __init__(
+            self,
+            base: str = "RUB",
+            provider: Optional[RateProvider] = None,
+            path: Optional[Path] = None,
+            retry_after: float = FAILED_FETCH_RETRY,
+    ):
+        self.base = base
+        self.provider = provider or fetch_rate_history
+        self.path = path
+        self.retry_after = retry_after
+        self.table = self._load()
+        # Валюта -> запрошенные периоды (начало, конец, когда можно повторить; None — успешный запрос)
+        self._attempted: Dict[str, List[Tuple[pd.Timestamp, pd.Timestamp, Optional[float]]]] = {}
+        self._lock = threading.Lock()
+
+    def _load(self) -> pd.DataFrame:
+        if self.path is None or not self.path.exists():
+            return _empty_rates()
+        logger.info("Loading currency rates from %s", self.path)
+        table = pd.read_csv(self.path, index_col="date", parse_dates=["date"])
+        return table.astype(float).sort_index()
+
+    def _save(self) -> None:
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Временный файл + os.replace, чтобы читатели не увидели недописанный CSV
+        fd, tmp_name = tempfile.mkstemp(dir=self.path.parent, prefix=f".{self.path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+                self.table.to_csv(f, index_label="date")
+            os.replace(tmp_name, self.path)
+        except BaseException:
+            os.unlink(tmp_name)
+            raise
+
+    def _missing_days(self, currency: str, days: pd.DatetimeIndex, now: float) -> pd.DatetimeIndex:
+        """Дни, для которых курса нет в таблице и которые сейчас не нужно запрашивать повторно."""
+        if currency in self.table.columns:
+            days = days.difference(pd.DatetimeIndex(self.table.index[self.table[currency].notna()]))
+        attempts = [a for a in self._attempted.get(currency, []) if a[2] is None or a[2] > now]
+        self._attempted[currency] = attempts
+        for lo, hi, _ in attempts:
+            days = days[(days < lo) | (days > hi)]
+        return days
+
+    def ensure(self, currencies: List[str], start: DateLike, end: DateLike) -> None:
+        """Гарантирует наличие курсов валют за период, при необходимости запрашивая провайдера."""
+        days = pd.date_range(pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize(), freq="D")
+        with self._lock:
+            now = time.monotonic()
+            missing = {cur: self._missing_days(cur, days, now) for cur in currencies if cur != self.base}
+            missing = {cur: m for cur, m in missing.items() if len(m)}
+            if not missing:
+                return
+            chunk_start = min(m.min() for m in missing.values())
+            last = max(m.max() for m in missing.values())
+            updated = False
+            while chunk_start <= last:
+                chunk_end = min(chunk_start + pd.Timedelta(days=MAX_FETCH_DAYS - 1), last)
+                needed = sorted(cur for cur, m in missing.items() if ((m >= chunk_start) & (m <= chunk_end)).any())
+                if needed:
+                    updated = self._fetch(needed, chunk_start, chunk_end) or updated
+                chunk_start = chunk_end + pd.Timedelta(days=1)
+            if updated:
+                self._save()
+
+    def _fetch(self, currencies: List[str], start: pd.Timestamp, end: pd.Timestamp) -> bool:
+        fetched = _empty_rates(currencies)
+        try:
+            fetched = self.provider(currencies, self.base, start.to_pydatetime(), end.to_pydatetime())
+        except Exception as e:
+            logger.exception("Failed to fetch currency rates: %s", e)
+        retry_at = time.monotonic() + self.retry_after if fetched.empty else None
+        for cur in currencies:
+            self._attempted.setdefault(cur, []).append((start, end, retry_at))
+        if fetched.empty:
+            logger.warning("No currency rates for %s from %s to %s", currencies, start, end)
+            return False
+        fetched = fetched.astype(float)
+        fetched.index = pd.DatetimeIndex(fetched.index).normalize()
+        fetched.index.name = "date"
+        table = fetched.combine_first(self.table) if not self.table.empty else fetched
+        self.table = table.sort_index()
+        return True
+
+    def rates_long(self, currencies: List[str]) -> pd.DataFrame:
+        """Курсы в длинном формате (date, currency, rate), отсортированные по дате — для merge_asof."""
+        columns = [cur for cur in currencies if cur in self.table.columns]
+        if not columns:
+            return pd.DataFrame(
+                {
+                    "date": pd.Series(dtype="datetime64[ns]"),
+                    "currency": pd.Series(dtype=str),
+                    "rate": pd.Series(dtype=float),
+                }
+            )
+        long = self.table[columns].rename_axis("date").reset_index().melt(
+            id_vars="date", var_name="currency", value_name="rate"
+        )
+        long = long.dropna(subset=["rate"])
+        long["date"] = long["date"].astype("datetime64[ns]")
+        return long.sort_values("date", kind="stable").reset_index(drop=True)
+
+
+def convert_amounts(
+        df: pd.DataFrame,
+        store: RateStore,
+        amount_column: str = "Сумма операции",
+        currency_column: str = "Валюта операции",
+        date_column: str = "Дата операции",
+) -> pd.Series:
+    """Переводит суммы в базовую валюту хранилища по курсу на дату операции.
+
+    Берётся последний известный курс не старше MAX_RATE_AGE; без курса результат — NaN.
+    """
+    amounts = pd.to_numeric(df[amount_column], errors="coerce")
+    currencies = df[currency_column].fillna(store.base).astype(str)
+    dates = pd.to_datetime(df[date_column], errors="coerce")
+
+    foreign = sorted(set(currencies) - {store.base})
+    rate = np.where(currencies.to_numpy() == store.base, 1.0, np.nan)
+
+    valid_dates = dates[currencies != store.base].dropna()
+    if foreign and not valid_dates.empty:
+        store.ensure(foreign, valid_dates.min(), valid_dates.max())
+        left = pd.DataFrame(
+            {"pos": np.arange(len(df)), "date": dates.astype("datetime64[ns]").to_numpy(), "currency": currencies}
+        )
+        left = left[(left["currency"] != store.base) & left["date"].notna()].sort_values("date", kind="stable")
+        rates = store.rates_long(foreign)
+        if not rates.empty:
+            merged = pd.merge_asof(left, rates, on="date", by="currency", direction="backward", tolerance=MAX_RATE_AGE)
+            rate[merged["pos"].to_numpy()] = merged["rate"].to_numpy(dtype=float)
+
+    missing = int(np.isnan(rate).sum())
+    if missing:
+        logger.warning("No currency rate for %s operations", missing)
+    return pd.Series(amounts.to_numpy(dtype=float) * rate, index=df.index, name=amount_column)
+
+
+_stores: Dict[Tuple[str, bool], RateStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_rate_store(base: str, settings: Optional[Dict[str, Any]] = None) -> RateStore:
+    """Общее для процесса хранилище курсов к base.
+
+    Если в настройках задано exchange_api.offline_rates ({валюта: курс}), используется
+    локальный static_rate_provider без сети; иначе — API и кэш data/fx_rates_<base>.csv.
+    """
+    settings = settings or utils.load_user_settings()
+    api_conf = settings.get("exchange_api", {})
+    offline_rates = api_conf.get("offline_rates") if isinstance(api_conf, dict) else None
+    key = (base, isinstance(offline_rates, dict))
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            if isinstance(offline_rates, dict):
+                store = RateStore(base, provider=static_rate_provider(offline_rates))
+            else:
+                store = RateStore(base, path=DATA_DIR / f"fx_rates_{base}.csv")
+            _stores[key] = store
+        return store
+
+
+def convert_transactions(df: pd.DataFrame, base: str, store: Optional[RateStore] = None) -> pd.DataFrame:
+    """Возвращает копию операций, где Сумма платежа пересчитана в base из Суммы операции.
+
+    Операции, уже списанные в base (Валюта платежа == base), сохраняют точную сумму банка.
+    Строки без курса остаются с исходными Суммой и Валютой платежа.
+    """
+    if df.empty:
+        return df
+    if "Сумма операции" not in df.columns or "Валюта операции" not in df.columns:
+        logger.warning("Нет колонок для пересчёта в %s", base)
+        return df
+    if "Валюта платежа" in df.columns:
+        to_convert = (df["Валюта платежа"] != base).to_numpy()
+    else:
+        to_convert = np.ones(len(df), dtype=bool)
+    converted = df.copy()
+    if not to_convert.any():
+        return converted
+
+    store = store or get_rate_store(base)
+    positions = np.flatnonzero(to_convert)
+    amounts = convert_amounts(df.iloc[positions], store).to_numpy()
+    has_rate = ~np.isnan(amounts)
+    rows = positions[has_rate]
+
+    payment = np.full(len(df), np.nan)
+    if "Сумма платежа" in df.columns:
+        payment = pd.to_numeric(df["Сумма платежа"], errors="coerce").to_numpy(dtype=float, copy=True)
+    payment[rows] = amounts[has_rate]
+    converted["Сумма платежа"] = payment
+
+    payment_currency = np.full(len(df), None, dtype=object)
+    if "Валюта платежа" in df.columns:
+        payment_currency = df["Валюта платежа"].to_numpy(dtype=object, copy=True)
+    payment_currency[rows] = base
+    converted["Валюта платежа"] = payment_currency
+    return converted
@@ -1,15 +1,58 @@
 import json
 import logging
+import os
+import tempfile
 from datetime import datetime
 from functools import wraps
 from pathlib import Path
 from typing import Any, Callable, Dict, Optional
 
+import numpy as np
 import pandas as pd
 
+from src.currency import RateStore, convert_transactions
+from src.timeseries import SpendingSeries, series_to_records
+from src.utils import date_index_matches, date_range_bounds
+
 logger = logging.getLogger(__name__)
 
 
+def _reserve_report_path(report_dir: Path, name: str) -> Path:
+    """Резервирует свободное имя отчёта, добавляя суффикс _1, _2, ... если файл уже есть."""
+    file_path = report_dir / name
+    counter = 1
+    while True:
+        try:
+            # Создание с флагом "x" атомарно, поэтому два потока не получат одно имя
+            open(file_path, "x").close()
+            return file_path
+        except FileExistsError:
+            file_path = report_dir / f"{Path(name).stem}_{counter}{Path(name).suffix}"
+            counter += 1
+
+
+def write_report(result: Any, report_dir: Path, name: str, unique: bool = False) -> Path:
+    """Записывает отчёт в JSON через временный файл, чтобы параллельные записи не перемешивались.
+
+    При unique=True к имени добавляется суффикс, если такой файл уже есть.
+    """
+    report_dir.mkdir(parents=True, exist_ok=True)
+    file_path = _reserve_report_path(report_dir, name) if unique else report_dir / name
+    fd, tmp_name = tempfile.mkstemp(dir=report_dir, prefix=f".{file_path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, default=str)
+        os.replace(tmp_name, file_path)
+    except BaseException:
+        os.unlink(tmp_name)
+        if unique:
+            # Убираем пустой файл, которым было зарезервировано имя
+            file_path.unlink(missing_ok=True)
+        raise
+    logger.info("Report saved to %s", file_path)
+    return file_path
+
+
 def save_report(file_name: Optional[str] = None) -> Callable[..., Callable[..., Any]]:
     """Декоратор для сохранения результатов отчёта в JSON."""
 
@@ -18,13 +61,8 @@ def save_report(file_name: Optional[str] = None) -> Callable[..., Callable[...,
         def wrapper(*args: Any, **kwargs: Any) -> Any:
             result = func(*args, **kwargs)
             name = file_name or f"report_{func.__name__}_{datetime.now().strftime('%Y%m%d%H%M%S')}.json"
-            report_dir = Path("reports")
-            report_dir.mkdir(parents=True, exist_ok=True)
-            file_path = report_dir / name
             try:
-                with open(file_path, "w", encoding="utf-8") as f:
-                    json.dump(result, f, ensure_ascii=False, default=str)
-                logger.info("Report saved to %s", file_path)
+                write_report(result, Path("reports"), name, unique=file_name is None)
             except Exception as e:
                 logger.exception("Failed to save report: %s", e)
             return result
@@ -34,17 +72,27 @@ def save_report(file_name: Optional[str] = None) -> Callable[..., Callable[...,
     return decorator
 
 
-@save_report()
-def spending_by_category(transactions: pd.DataFrame, category: str, date: Optional[str] = None) -> Dict[str, Any]:
-    """Считает траты по категории за последние 3 месяца."""
+def calculate_spending_by_category(
+    transactions: pd.DataFrame,
+    category: str,
+    date: Optional[str] = None,
+    base_currency: Optional[str] = None,
+    date_index: Optional[pd.DatetimeIndex] = None,
+    rate_store: Optional[RateStore] = None,
+) -> Dict[str, Any]:
+    """Считает траты по категории за последние 3 месяца (в base_currency, если задана), без сохранения в файл.
+
+    date_index из build_date_index позволяет найти период бинарным поиском;
+    rate_store — хранилище курсов (например, с локальным провайдером для работы без сети).
+    """
 
     if "Дата операции" not in transactions.columns or "Сумма платежа" not in transactions.columns:
         logger.warning("Не найдены необходимые колонки")
         return {}
 
-    df = transactions.copy()
-    df["Дата операции"] = pd.to_datetime(df["Дата операции"], errors="coerce")
-    df["Сумма платежа"] = pd.to_numeric(df["Сумма платежа"], errors="coerce").fillna(0)
+    df = convert_transactions(transactions, base_currency, rate_store) if base_currency else transactions
+    if not pd.api.types.is_datetime64_any_dtype(df["Дата операции"]):
+        df = df.assign(**{"Дата операции": pd.to_datetime(df["Дата операции"], errors="coerce")})
 
     # Если дата не передана, берем максимальную дату из данных
     if date:
@@ -58,16 +106,15 @@ def spending_by_category(transactions: pd.DataFrame, category: str, date: Option
     # Начало периода — ровно 3 месяца назад от end
     start = end - pd.DateOffset(months=3)
 
-    mask = (df["Дата операции"] > start) & (df["Дата операции"] <= end)
-    df_filtered = df.loc[mask]
+    if date_index is not None and date_index_matches(df, date_index):
+        lo, hi = date_range_bounds(date_index, start, end, include_start=False)
+        df_filtered = df.iloc[lo:hi]
+    else:
+        mask = (df["Дата операции"] > start) & (df["Дата операции"] <= end)
+        df_filtered = df.loc[mask]
+    amounts = pd.to_numeric(df_filtered["Сумма платежа"], errors="coerce").fillna(0)
 
-    total_spent = float(
-        (
-            -df_filtered.loc[
-                (df_filtered["Категория"] == category) & (df_filtered["Сумма платежа"] < 0), "Сумма платежа"
-            ]
-        ).sum()
-    )
+    total_spent = float((-amounts.loc[(df_filtered["Категория"] == category) & (amounts < 0)]).sum())
 
     return {
         "category": category,
@@ -75,3 +122,83 @@ def spending_by_category(transactions: pd.DataFrame, category: str, date: Option
         "end_date": end.strftime("%Y-%m-%d"),
         "total_spent": round(total_spent, 2),
     }
+
+
+@save_report()
+def spending_by_category(
+    transactions: pd.DataFrame,
+    category: str,
+    date: Optional[str] = None,
+    base_currency: Optional[str] = None,
+    date_index: Optional[pd.DatetimeIndex] = None,
+    rate_store: Optional[RateStore] = None,
+) -> Dict[str, Any]:
+    """Считает траты по категории за последние 3 месяца и сохраняет отчёт в reports/."""
+
+    return calculate_spending_by_category(transactions, category, date, base_currency, date_index, rate_store)
+
+
+@save_report()
+def rolling_spending(
+    transactions: pd.DataFrame,
+    by: str = "Категория",
+    freq: str = "D",
+    window: int = 7,
+    base_currency: Optional[str] = None,
+    rate_store: Optional[RateStore] = None,
+) -> Dict[str, Any]:
+    """Скользящие суммы и средние расходов по категориям или картам (by) с частотой D/W/M."""
+
+    if base_currency:
+        transactions = convert_transactions(transactions, base_currency, rate_store)
+    series = SpendingSeries(transactions, by=by)
+    if series.daily.empty:
+        logger.warning("Нет данных для построения ряда")
+        return {}
+
+    return {
+        "by": by,
+        "freq": freq,
+        "window": window,
+        "start_date": series.daily.index.min().strftime("%Y-%m-%d"),
+        "end_date": series.daily.index.max().strftime("%Y-%m-%d"),
+        "rolling_total": series_to_records(series.rolling_total(freq, window)),
+        "moving_average": series_to_records(series.moving_average(freq, window)),
+    }
+
+
+@save_report()
+def spending_month_over_month(
+    transactions: pd.DataFrame,
+    by: str = "Категория",
+    base_currency: Optional[str] = None,
+    rate_store: Optional[RateStore] = None,
+) -> Dict[str, Any]:
+    """Помесячные расходы по категориям или картам (by) и изменение к предыдущему месяцу."""
+
+    if base_currency:
+        transactions = convert_transactions(transactions, base_currency, rate_store)
+    series = SpendingSeries(transactions, by=by)
+    if series.daily.empty:
+        logger.warning("Нет данных для построения ряда")
+        return {}
+
+    table = series.month_over_month()
+    months = [d.strftime("%Y-%m") for d in table.index]
+    result: Dict[str, Any] = {}
+    for key in series.daily.columns:
+        rows = []
+        for month, total, delta, pct in zip(
+            months, table[("total", key)], table[("delta", key)], table[("pct_change", key)]
+        ):
+            rows.append(
+                {
+                    "month": month,
+                    "total": round(float(total), 2),
+                    "delta": None if np.isnan(delta) else round(float(delta), 2),
+                    "pct_change": None if np.isnan(pct) else round(float(pct), 2),
+                }
+            )
+        result[str(key)] = rows
+
+    return {"by": by, "months": result}
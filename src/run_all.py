@@ -1,3 +1,4 @@
+import logging
 from typing import Any, Dict, List
 
 from src.reports import spending_by_category
@@ -52,4 +53,5 @@ def run_all() -> None:
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
     run_all()
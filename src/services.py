@@ -1,6 +1,6 @@
 import json
 import logging
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Mapping, Optional, Sequence
 
 import numpy as np
 import pandas as pd
@@ -24,7 +24,7 @@ def clean_for_json(obj: Any) -> Any:
         return obj
 
 
-def simple_search(query: str, transactions: List[Dict[str, Any]], limit: Optional[int] = None) -> str:
+def simple_search(query: str, transactions: Sequence[Mapping[str, Any]], limit: Optional[int] = None) -> str:
     logger.info("Simple search for: %s", query)
     q = query.lower()
     filtered = [
@@ -36,7 +36,7 @@ def simple_search(query: str, transactions: List[Dict[str, Any]], limit: Optiona
 
     results = []
     for t in filtered:
-        new_t = t.copy()
+        new_t: Dict[str, Any] = dict(t)
         for k, v in new_t.items():
             # Проверяем, можно ли применять pd.isna
             if isinstance(v, pd.Timestamp):
@@ -0,0 +1,145 @@
+import logging
+import threading
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Generic, Hashable, Mapping, Optional, Tuple, TypeVar
+
+import pandas as pd
+
+from src.utils import DATA_FILE, build_date_index, load_transactions_excel
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Состояние файла: (время изменения в нс, размер)
+FileState = Tuple[int, int]
+
+
+def file_state(path: Path) -> Optional[FileState]:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class _Call(Generic[T]):
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Optional[T] = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight(Generic[T]):
+    """Схлопывает одновременные вызовы с одним ключом: функция выполняется один раз,
+    остальные потоки ждут и получают тот же результат (или то же исключение)."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call[T]] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if call is None:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result  # type: ignore[return-value]
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+
+class Snapshot:
+    """Снимок операций, общий для всех потоков.
+
+    Записи для поиска — кортеж словарей только для чтения (MappingProxyType); они строятся
+    один раз при первом обращении. Таблицу frame изменять нельзя: при перезагрузке снимок
+    не правится, а заменяется новым целиком.
+    """
+
+    __slots__ = ("_frame", "_state", "_date_index", "_records", "_records_lock")
+
+    def __init__(self, frame: pd.DataFrame, state: Optional[FileState]) -> None:
+        self._frame = frame
+        self._state = state
+        self._date_index = build_date_index(frame)
+        self._records: Optional[Tuple[Mapping[str, Any], ...]] = None
+        self._records_lock = threading.Lock()
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        return self._frame
+
+    @property
+    def state(self) -> Optional[FileState]:
+        return self._state
+
+    @property
+    def date_index(self) -> Optional[pd.DatetimeIndex]:
+        """Отсортированный индекс дат для filter_transactions_by_range (None, если даты не отсортированы)."""
+        return self._date_index
+
+    @property
+    def records(self) -> Tuple[Mapping[str, Any], ...]:
+        records = self._records
+        if records is None:
+            with self._records_lock:
+                if self._records is None:
+                    self._records = tuple(
+                        MappingProxyType({str(k): v for k, v in record.items()})
+                        for record in self._frame.to_dict(orient="records")
+                    )
+                records = self._records
+        return records
+
+
+class TransactionStore:
+    """Потокобезопасный доступ к операциям для многопоточного сервера.
+
+    Снимок перечитывается только при изменении файла и подменяется одной операцией
+    присваивания, поэтому читатели работают без блокировок. Одновременные перезагрузки
+    схлопываются в одну через SingleFlight.
+    """
+
+    def __init__(self, path: Path = DATA_FILE, loader: Optional[Callable[[], pd.DataFrame]] = None) -> None:
+        self.path = path
+        self._loader = loader or (lambda: load_transactions_excel(path))
+        self._snapshot: Optional[Snapshot] = None
+        self._flight: SingleFlight[Snapshot] = SingleFlight()
+
+    def get(self) -> Snapshot:
+        snapshot = self._snapshot
+        state = file_state(self.path)
+        if snapshot is not None and snapshot.state == state:
+            return snapshot
+        return self._flight.do(state, lambda: self._reload(state))
+
+    def _reload(self, state: Optional[FileState]) -> Snapshot:
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.state == state:
+            # Пока ждали, снимок уже обновил другой поток
+            return snapshot
+        logger.info("Reloading transactions snapshot from %s", self.path)
+        snapshot = Snapshot(self._loader(), state)
+        self._snapshot = snapshot
+        return snapshot
+
+    def reset(self) -> None:
+        """Сбрасывает снимок — следующий get() перечитает данные."""
+        self._snapshot = None
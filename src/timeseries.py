@@ -0,0 +1,116 @@
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Union
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DATE_COLUMN = "Дата операции"
+AMOUNT_COLUMN = "Сумма платежа"
+
+# Короткие обозначения частот -> алиасы pandas (месяц считаем от первого числа)
+FREQ_ALIASES = {"D": "D", "W": "W", "M": "MS"}
+
+DateLike = Union[str, datetime, pd.Timestamp]
+
+
+class SpendingSeries:
+    """Дневной ряд расходов по ключу (категория, карта) с накопленными суммами.
+
+    Ряд строится один раз, а любые оконные запросы считаются разностью накопленных сумм.
+    """
+
+    def __init__(self, transactions: pd.DataFrame, by: str = "Категория") -> None:
+        self.by = by
+        self.daily = build_daily_spending(transactions, by)
+        # Строка нулей в начале, чтобы сумма окна [i, j] была cumsum[j + 1] - cumsum[i]
+        values = self.daily.to_numpy(dtype=float)
+        self._cumsum = np.vstack([np.zeros((1, values.shape[1])), values.cumsum(axis=0)])
+
+    @property
+    def keys(self) -> List[str]:
+        return [str(k) for k in self.daily.columns]
+
+    def window_total(self, start: DateLike, end: DateLike) -> pd.Series:
+        """Сумма расходов по каждому ключу за дни [start, end] включительно."""
+        index = self.daily.index
+        lo = index.searchsorted(pd.Timestamp(start).normalize(), side="left")
+        hi = index.searchsorted(pd.Timestamp(end).normalize(), side="right")
+        if hi <= lo:
+            return pd.Series(0.0, index=self.daily.columns)
+        return pd.Series(self._cumsum[hi] - self._cumsum[lo], index=self.daily.columns)
+
+    def resample(self, freq: str = "D") -> pd.DataFrame:
+        """Расходы, агрегированные по периодам: D — день, W — неделя, M — месяц."""
+        alias = FREQ_ALIASES.get(freq)
+        if alias is None:
+            raise ValueError(f"Unsupported frequency: {freq}")
+        if alias == "D":
+            return self.daily
+        return self.daily.resample(alias).sum()
+
+    def rolling_total(self, freq: str = "D", window: int = 7) -> pd.DataFrame:
+        """Скользящая сумма за последние window периодов."""
+        if window < 1:
+            raise ValueError("window must be positive")
+        periods = self.resample(freq)
+        if freq == "D":
+            cumsum = self._cumsum
+        else:
+            values = periods.to_numpy(dtype=float)
+            cumsum = np.vstack([np.zeros((1, values.shape[1])), values.cumsum(axis=0)])
+        ends = np.arange(1, len(periods) + 1)
+        starts = np.maximum(ends - window, 0)
+        return pd.DataFrame(cumsum[ends] - cumsum[starts], index=periods.index, columns=periods.columns)
+
+    def moving_average(self, freq: str = "D", window: int = 7) -> pd.DataFrame:
+        """Скользящее среднее за последние window периодов (в начале ряда — по доступным периодам)."""
+        totals = self.rolling_total(freq, window)
+        counts = np.minimum(np.arange(1, len(totals) + 1), window)
+        return totals.div(counts, axis=0)
+
+    def month_over_month(self) -> pd.DataFrame:
+        """Помесячные расходы с абсолютным и относительным изменением к предыдущему месяцу."""
+        monthly = self.resample("M")
+        delta = monthly.diff()
+        pct = delta / monthly.shift(1).replace(0, np.nan) * 100
+        return pd.concat({"total": monthly, "delta": delta, "pct_change": pct}, axis=1)
+
+
+def build_daily_spending(transactions: pd.DataFrame, by: str = "Категория") -> pd.DataFrame:
+    """Строит таблицу расходов по дням (строки) и значениям колонки by (столбцы).
+
+    Расходом считается операция с отрицательной суммой платежа, берётся по модулю.
+    Индекс непрерывный: дни без операций заполняются нулями.
+    """
+    if DATE_COLUMN not in transactions.columns or AMOUNT_COLUMN not in transactions.columns:
+        logger.warning("Не найдены необходимые колонки")
+        return pd.DataFrame(index=pd.DatetimeIndex([], name=DATE_COLUMN))
+    if by not in transactions.columns:
+        logger.warning("Не найдена колонка %s", by)
+        return pd.DataFrame(index=pd.DatetimeIndex([], name=DATE_COLUMN))
+
+    dates = pd.to_datetime(transactions[DATE_COLUMN], errors="coerce").dt.normalize()
+    amounts = pd.to_numeric(transactions[AMOUNT_COLUMN], errors="coerce").fillna(0)
+    frame = pd.DataFrame({DATE_COLUMN: dates, by: transactions[by], "expense": (-amounts).clip(lower=0)})
+    frame = frame.dropna(subset=[DATE_COLUMN, by])
+    if frame.empty:
+        return pd.DataFrame(index=pd.DatetimeIndex([], name=DATE_COLUMN))
+
+    daily = frame.pivot_table(index=DATE_COLUMN, columns=by, values="expense", aggfunc="sum", fill_value=0.0)
+    full_range = pd.date_range(daily.index.min(), daily.index.max(), freq="D", name=DATE_COLUMN)
+    return daily.reindex(full_range, fill_value=0.0).astype(float)
+
+
+def series_to_records(frame: pd.DataFrame, date_fmt: str = "%Y-%m-%d") -> Dict[str, List[Dict[str, Any]]]:
+    """Преобразует таблицу (даты x ключи) в {ключ: [{date, value}, ...]} для JSON."""
+    result: Dict[str, List[Dict[str, Any]]] = {}
+    dates = [d.strftime(date_fmt) for d in frame.index]
+    for key in frame.columns:
+        values = frame[key].to_numpy(dtype=float)
+        result[str(key)] = [
+            {"date": d, "value": None if np.isnan(v) else round(float(v), 2)} for d, v in zip(dates, values)
+        ]
+    return result
@@ -13,12 +13,6 @@ from config import DATA_DIR, ROOT_DIR
 load_dotenv()
 
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
-ch = logging.StreamHandler()
-ch.setLevel(logging.INFO)
-formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
-ch.setFormatter(formatter)
-logger.addHandler(ch)
 
 DATA_FILE = DATA_DIR / "operations.xlsx"
 USER_SETTINGS_FILE = ROOT_DIR / "user_settings.json"
@@ -53,7 +47,49 @@ def load_transactions_excel(path: Optional[Path] = None) -> pd.DataFrame:
         if col in df.columns:
             df[col] = pd.to_datetime(df[col], format="%d.%m.%Y %H:%M:%S", errors="coerce")
 
-    return df
+    return sort_by_date(df)
+
+
+def sort_by_date(df: pd.DataFrame) -> pd.DataFrame:
+    """Сортирует операции по дате (строки без даты — в конце), чтобы диапазоны искать бинарным поиском."""
+    if "Дата операции" not in df.columns:
+        return df
+    return df.sort_values("Дата операции", kind="stable", na_position="last").reset_index(drop=True)
+
+
+def build_date_index(df: pd.DataFrame) -> Optional[pd.DatetimeIndex]:
+    """Индекс дат (без NaT в конце) отсортированной таблицы для date_range_bounds.
+
+    Строится один раз за O(n) — его хранит владелец таблицы (снимок операций).
+    Возвращает None, если даты не отсортированы.
+    """
+    if "Дата операции" not in df.columns or not pd.api.types.is_datetime64_any_dtype(df["Дата операции"]):
+        return None
+    dates = df["Дата операции"]
+    index = pd.DatetimeIndex(dates.iloc[: int(dates.notna().sum())])
+    if not index.is_monotonic_increasing:
+        return None
+    return index
+
+
+def date_range_bounds(
+        date_index: pd.DatetimeIndex, start: datetime, end: datetime, include_start: bool = True
+) -> Tuple[int, int]:
+    """Позиции [lo, hi) строк с датой в диапазоне до end включительно — два вызова searchsorted."""
+    lo = int(date_index.searchsorted(pd.Timestamp(start), side="left" if include_start else "right"))
+    hi = int(date_index.searchsorted(pd.Timestamp(end), side="right"))
+    return lo, max(lo, hi)
+
+
+def date_index_matches(df: pd.DataFrame, date_index: pd.DatetimeIndex) -> bool:
+    """Быстрая (O(1)) проверка, что индекс дат всё ещё соответствует таблице: сверяются крайние и средняя строки."""
+    n = len(date_index)
+    if n > len(df) or "Дата операции" not in df.columns:
+        return False
+    if n == 0:
+        return bool(df["Дата операции"].isna().all())
+    dates = df["Дата операции"]
+    return all(dates.iloc[i] == date_index[i] for i in (0, n // 2, n - 1))
 
 
 def load_user_settings(path: Optional[Path] = None) -> Dict[str, Any]:
@@ -81,12 +117,23 @@ def month_start_and_target(date_str: str) -> Tuple[datetime, datetime]:
     return start, dt
 
 
-def filter_transactions_by_range(df: pd.DataFrame, start: datetime, end: datetime) -> pd.DataFrame:
+def filter_transactions_by_range(
+        df: pd.DataFrame, start: datetime, end: datetime, date_index: Optional[pd.DatetimeIndex] = None
+) -> pd.DataFrame:
+    """Операции с датой в [start, end].
+
+    С индексом дат из build_date_index диапазон ищется бинарным поиском, иначе — полным просмотром.
+    Результат не копируется и может ссылаться на данные df (в том числе на общий снимок
+    операций), поэтому его нельзя изменять — для изменений вызывайте .copy().
+    """
     if "Дата операции" not in df.columns:
         logger.warning("Дата операции column not found")
         return pd.DataFrame()
+    if date_index is not None and date_index_matches(df, date_index):
+        lo, hi = date_range_bounds(date_index, start, end)
+        return df.iloc[lo:hi]
     mask = (df["Дата операции"] >= start) & (df["Дата операции"] <= end)
-    return df.loc[mask].copy()
+    return df.loc[mask]
 
 
 class CurrencyRate(TypedDict):
@@ -1,7 +1,12 @@
 import json
 import logging
 from datetime import datetime
+from typing import Any, Optional
 
+import pandas as pd
+
+from .currency import RateStore, convert_transactions, get_rate_store
+from .store import SingleFlight, TransactionStore
 from .utils import (
     cards_summary,
     filter_transactions_by_range,
@@ -16,25 +21,46 @@ from .utils import (
 
 logger = logging.getLogger(__name__)
 
+# Общие для всех потоков: снимок операций и схлопывание одновременных запросов к API
+transactions_store = TransactionStore(loader=lambda: load_transactions_excel())
+_flight: SingleFlight[Any] = SingleFlight()
+
 
-def main_view(date_str: str) -> str:
+def main_view(
+        date_str: str,
+        base_currency: Optional[str] = None,
+        transactions: Optional[pd.DataFrame] = None,
+        rate_store: Optional[RateStore] = None,
+) -> str:
     logger.info(f"main_view called with {date_str}")
     start_date, end_date = month_start_and_target(date_str)
 
-    df = load_transactions_excel()
-    df_filtered = filter_transactions_by_range(df, start_date, end_date)
+    settings = load_user_settings()
+    if settings is None:
+        settings = {}
+
+    if transactions is not None:
+        df_filtered = filter_transactions_by_range(transactions, start_date, end_date)
+    else:
+        snapshot = transactions_store.get()
+        df_filtered = filter_transactions_by_range(snapshot.frame, start_date, end_date, snapshot.date_index)
+
+    # Мультивалютный режим: суммы пересчитываются в базовую валюту по историческим курсам
+    base_currency = base_currency or settings.get("base_currency")
+    if base_currency:
+        df_filtered = convert_transactions(
+            df_filtered, base_currency, rate_store or get_rate_store(base_currency, settings)
+        )
 
     cards = cards_summary(df_filtered)
     top = top_transactions(df_filtered, top_n=5)
 
-    settings = load_user_settings()
-    if settings is None:
-        settings = {}
     user_currencies = settings.get("user_currencies", [])
     user_stocks = settings.get("user_stocks", [])
 
-    currency_rates = get_currency_rates(user_currencies)
-    stock_prices = get_stock_prices(user_stocks)
+    # Одновременные вызовы с одинаковыми списками делят один запрос к API
+    currency_rates = _flight.do(("rates", tuple(user_currencies)), lambda: get_currency_rates(user_currencies))
+    stock_prices = _flight.do(("stocks", tuple(user_stocks)), lambda: get_stock_prices(user_stocks))
 
     dt = datetime.strptime(date_str, "%Y-%m-%d %H:%M:%S")
     greeting = greeting_by_time(dt)
@@ -0,0 +1,187 @@
+import argparse
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+import pandas as pd
+
+from config import DATA_DIR, REPORT_DIR
+from src.reports import calculate_spending_by_category, write_report
+from src.store import FileState, file_state
+from src.utils import load_transactions_excel
+from src.views import main_view
+
+logger = logging.getLogger(__name__)
+
+
+def scan_directory(data_dir: Path, pattern: str = "*.xlsx") -> Dict[Path, FileState]:
+    """Снимок файлов каталога данных: путь -> (mtime, размер)."""
+    states: Dict[Path, FileState] = {}
+    for path in sorted(data_dir.glob(pattern)):
+        # Временные файлы Excel (~$operations.xlsx) пропускаем
+        if path.name.startswith("~$"):
+            continue
+        state = file_state(path)
+        if state is not None:
+            states[path] = state
+    return states
+
+
+class DataWatcher:
+    """Следит за каталогом данных опросом и пересчитывает дашборд и отчёты по изменённым файлам.
+
+    Файл обрабатывается, когда его состояние не меняется в течение debounce секунд.
+    Пересчёты идут в пуле из max_workers потоков; повторное изменение файла во время
+    его пересчёта не запускает второй параллельный пересчёт, а ставит один повтор.
+    """
+
+    def __init__(
+            self,
+            data_dir: Path = DATA_DIR,
+            report_dir: Path = REPORT_DIR,
+            categories: Optional[List[str]] = None,
+            date_str: Optional[str] = None,
+            pattern: str = "*.xlsx",
+            interval: float = 1.0,
+            debounce: float = 2.0,
+            max_workers: int = 2,
+    ) -> None:
+        self.data_dir = data_dir
+        self.report_dir = report_dir
+        self.categories = categories or []
+        self.date_str = date_str
+        self.pattern = pattern
+        self.interval = interval
+        self.debounce = debounce
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="recompute")
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._seen: Dict[Path, FileState] = {}
+        self._pending: Dict[Path, Tuple[FileState, float]] = {}
+        self._running: Set[Path] = set()
+        self._dirty: Set[Path] = set()
+
+    def poll(self, now: Optional[float] = None) -> List[Path]:
+        """Один проход опроса. Возвращает файлы, отправленные на пересчёт."""
+        now = time.monotonic() if now is None else now
+        current = scan_directory(self.data_dir, self.pattern)
+
+        for path in set(self._seen) - set(current):
+            logger.info("File removed: %s", path)
+            self._seen.pop(path, None)
+            self._pending.pop(path, None)
+
+        ready: List[Path] = []
+        for path, state in current.items():
+            if self._seen.get(path) == state:
+                self._pending.pop(path, None)
+                continue
+            pending = self._pending.get(path)
+            if pending is None or pending[0] != state:
+                # Файл ещё пишется — ждём, пока состояние перестанет меняться
+                self._pending[path] = (state, now)
+            elif now - pending[1] >= self.debounce:
+                self._seen[path] = state
+                del self._pending[path]
+                ready.append(path)
+
+        for path in ready:
+            self.schedule(path)
+        return ready
+
+    def schedule(self, path: Path) -> None:
+        with self._lock:
+            if path in self._running:
+                self._dirty.add(path)
+                return
+            self._running.add(path)
+        self._executor.submit(self._run, path)
+
+    def _run(self, path: Path) -> None:
+        while True:
+            try:
+                self.recompute(path)
+            except Exception as e:
+                logger.exception("Failed to recompute reports for %s: %s", path, e)
+            with self._lock:
+                if path in self._dirty:
+                    self._dirty.discard(path)
+                    continue
+                self._running.discard(path)
+                return
+
+    def recompute(self, path: Path) -> None:
+        """Перечитывает файл и пересчитывает main_view и траты по категориям в report_dir."""
+        df = load_transactions_excel(path)
+
+        date_str = self.date_str
+        if date_str is None:
+            last = df["Дата операции"].max() if "Дата операции" in df.columns else pd.NaT
+            if pd.isna(last):
+                logger.warning("Нет валидных дат в %s", path)
+                return
+            date_str = last.strftime("%Y-%m-%d %H:%M:%S")
+
+        view_json = main_view(date_str, transactions=df)
+        write_report(json.loads(view_json), self.report_dir, f"main_view_{path.stem}.json")
+
+        # Без явной даты отчёт сам берёт последнюю дату операций, не обрезая её до полуночи
+        report_date = self.date_str[:10] if self.date_str else None
+        for category in self.categories:
+            report = calculate_spending_by_category(df, category, report_date)
+            write_report(report, self.report_dir, f"spending_by_category_{path.stem}_{category}.json")
+
+    def run(self) -> None:
+        logger.info("Watching %s (interval %ss, debounce %ss)", self.data_dir, self.interval, self.debounce)
+        try:
+            while not self._stop.is_set():
+                self.poll()
+                self._stop.wait(self.interval)
+        finally:
+            self._executor.shutdown(wait=True)
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Ждёт завершения всех запущенных пересчётов."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                if not self._running:
+                    return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Пересчёт дашборда и отчётов при изменении файлов в data/")
+    parser.add_argument("--category", action="append", default=[], help="Категория для отчёта по тратам")
+    parser.add_argument("--date", default=None, help="Дата дашборда YYYY-MM-DD HH:MM:SS (по умолчанию — последняя)")
+    parser.add_argument("--interval", type=float, default=1.0, help="Период опроса, сек")
+    parser.add_argument("--debounce", type=float, default=2.0, help="Сколько файл должен не меняться, сек")
+    parser.add_argument("--workers", type=int, default=2, help="Размер пула пересчёта")
+    args = parser.parse_args(argv)
+
+    watcher = DataWatcher(
+        categories=args.category,
+        date_str=args.date,
+        interval=args.interval,
+        debounce=args.debounce,
+        max_workers=args.workers,
+    )
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        logger.info("Watch mode stopped")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
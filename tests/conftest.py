@@ -61,3 +61,12 @@ def mock_currency_rates():
 @pytest.fixture
 def mock_stock_prices():
     return [{"stock": "AAPL", "price": 150.12}, {"stock": "AMZN", "price": 3173.18}]
+
+
+@pytest.fixture(autouse=True)
+def reset_transactions_store():
+    from src import views
+
+    views.transactions_store.reset()
+    yield
+    views.transactions_store.reset()
@@ -0,0 +1,201 @@
+import pandas as pd
+import pytest
+
+from src import currency
+
+
+@pytest.fixture
+def multi_currency_df():
+    data = {
+        "Дата операции": ["2021-12-01 10:00:00", "2021-12-03 12:00:00", "2021-12-05 18:00:00", None],
+        "Номер карты": ["*7197", "*7197", "*5814", "*5814"],
+        "Сумма операции": [-10.0, -100.0, -2.0, -5.0],
+        "Валюта операции": ["USD", "RUB", "EUR", "USD"],
+        "Сумма платежа": [-730.0, -100.0, -170.0, -360.0],
+    }
+    df = pd.DataFrame(data)
+    df["Дата операции"] = pd.to_datetime(df["Дата операции"])
+    return df
+
+
+def test_static_rate_provider():
+    provider = currency.static_rate_provider({"USD": 73.0})
+    table = provider(["USD", "EUR"], "RUB", pd.Timestamp("2021-12-01"), pd.Timestamp("2021-12-03"))
+    assert len(table) == 3
+    assert (table["USD"] == 73.0).all()
+    assert table["EUR"].isna().all()
+
+
+def test_convert_amounts_asof(multi_currency_df):
+    calls = []
+
+    def provider(currencies, base, start, end):
+        calls.append((tuple(currencies), start, end))
+        index = pd.to_datetime(["2021-11-30", "2021-12-03"])
+        return pd.DataFrame({"USD": [70.0, 75.0], "EUR": [80.0, 85.0]}, index=index)
+
+    store = currency.RateStore("RUB", provider=provider)
+    converted = currency.convert_amounts(multi_currency_df, store)
+
+    assert converted.iloc[0] == -700.0
+    assert converted.iloc[1] == -100.0
+    # Курс на 5 декабря берётся с последней известной даты — 3 декабря
+    assert converted.iloc[2] == -170.0
+    assert pd.isna(converted.iloc[3])
+    assert len(calls) == 1
+
+
+def test_rate_store_persists_and_reuses(tmp_path, multi_currency_df):
+    path = tmp_path / "fx_rates_RUB.csv"
+    provider = currency.static_rate_provider({"USD": 73.0, "EUR": 87.0})
+    store = currency.RateStore("RUB", provider=provider, path=path)
+    store.ensure(["USD", "EUR"], "2021-12-01", "2021-12-05")
+    assert path.exists()
+
+    def fail_provider(*args, **kwargs):
+        raise AssertionError("rates should come from the local store")
+
+    reloaded = currency.RateStore("RUB", provider=fail_provider, path=path)
+    converted = currency.convert_transactions(multi_currency_df, "RUB", reloaded)
+    assert list(converted["Сумма платежа"].iloc[:3]) == [-730.0, -100.0, -174.0]
+    assert (converted["Валюта платежа"].iloc[:3] == "RUB").all()
+    # У операции без даты курса нет — её сумма остаётся исходной
+    assert converted["Сумма платежа"].iloc[3] == -360.0
+
+
+def test_fetch_rate_history(monkeypatch):
+    def fake_get(url, params=None, **kwargs):
+        class FakeResponse:
+            def raise_for_status(self):
+                pass
+
+            def json(self):
+                return {"rates": {"2021-12-02": {"USD": 0.0125}, "2021-12-01": {"USD": 0.0125}}}
+
+        return FakeResponse()
+
+    monkeypatch.setattr("requests.get", fake_get)
+    table = currency.fetch_rate_history(["USD"], "RUB", pd.Timestamp("2021-12-01"), pd.Timestamp("2021-12-02"))
+    assert table.index.is_monotonic_increasing
+    assert (table["USD"] == 80.0).all()
+
+
+def test_fetch_rate_history_error(monkeypatch):
+    def fail_get(*args, **kwargs):
+        raise Exception("fail")
+
+    monkeypatch.setattr("requests.get", fail_get)
+    table = currency.fetch_rate_history(["USD"], "RUB", pd.Timestamp("2021-12-01"), pd.Timestamp("2021-12-02"))
+    assert table.empty
+
+
+def test_rate_store_fetches_gaps_between_cached_periods():
+    calls = []
+
+    def provider(currencies, base, start, end):
+        calls.append((start, end))
+        index = pd.date_range(start, end, freq="D")
+        return pd.DataFrame({"USD": 70.0 + index.month}, index=index)
+
+    store = currency.RateStore("RUB", provider=provider)
+    store.ensure(["USD"], "2021-01-01", "2021-01-31")
+    store.ensure(["USD"], "2021-12-01", "2021-12-31")
+    df = pd.DataFrame(
+        {
+            "Дата операции": pd.to_datetime(["2021-06-15 12:00:00"]),
+            "Сумма операции": [-1.0],
+            "Валюта операции": ["USD"],
+        }
+    )
+    assert currency.convert_amounts(df, store).iloc[0] == -76.0
+    assert calls[-1] == (pd.Timestamp("2021-06-15"), pd.Timestamp("2021-06-15"))
+
+
+def test_convert_transactions_keeps_amount_without_rate(multi_currency_df):
+    calls = []
+
+    def failing_provider(currencies, base, start, end):
+        calls.append(1)
+        return currency._empty_rates(currencies)
+
+    store = currency.RateStore("RUB", provider=failing_provider)
+    converted = currency.convert_transactions(multi_currency_df, "RUB", store)
+    assert list(converted["Сумма платежа"]) == [-730.0, -100.0, -170.0, -360.0]
+    # Неудачный запрос запоминается и не повторяется
+    currency.convert_transactions(multi_currency_df, "RUB", store)
+    assert len(calls) == 1
+
+
+def test_convert_amounts_ignores_stale_rates():
+    def provider(currencies, base, start, end):
+        return pd.DataFrame({"USD": [70.0]}, index=pd.to_datetime(["2021-01-01"]))
+
+    store = currency.RateStore("RUB", provider=provider)
+    df = pd.DataFrame(
+        {
+            "Дата операции": pd.to_datetime(["2021-01-02", "2021-06-15"]),
+            "Сумма операции": [-1.0, -1.0],
+            "Валюта операции": ["USD", "USD"],
+        }
+    )
+    converted = currency.convert_amounts(df, store)
+    assert converted.iloc[0] == -70.0
+    assert pd.isna(converted.iloc[1])
+
+
+def test_convert_transactions_keeps_amounts_charged_in_base(multi_currency_df):
+    df = multi_currency_df.assign(**{"Валюта платежа": ["RUB", "RUB", "USD", "RUB"]})
+    store = currency.RateStore("RUB", provider=currency.static_rate_provider({"USD": 73.0, "EUR": 87.0}))
+    converted = currency.convert_transactions(df, "RUB", store)
+    # Списано в RUB — точная сумма банка сохраняется; EUR-операция со списанием в USD пересчитывается
+    assert list(converted["Сумма платежа"]) == [-730.0, -100.0, -174.0, -360.0]
+    assert list(converted["Валюта платежа"]) == ["RUB", "RUB", "RUB", "RUB"]
+
+
+def test_rate_store_fetches_long_periods_in_chunks():
+    calls = []
+
+    def provider(currencies, base, start, end):
+        calls.append((start, end))
+        return currency.static_rate_provider({"USD": 73.0})(currencies, base, start, end)
+
+    store = currency.RateStore("RUB", provider=provider)
+    store.ensure(["USD"], "2018-01-01", "2021-12-31")
+    # 1461 день -> 5 запросов
+    assert len(calls) == 5
+    assert all((end - start).days < currency.MAX_FETCH_DAYS for start, end in calls)
+    assert store.table["USD"].notna().sum() == len(pd.date_range("2018-01-01", "2021-12-31"))
+
+
+def test_rate_store_retries_failed_fetch_after_delay():
+    calls = []
+
+    def flaky_provider(currencies, base, start, end):
+        calls.append(1)
+        if len(calls) == 1:
+            raise ConnectionError("offline")
+        return currency.static_rate_provider({"USD": 73.0})(currencies, base, start, end)
+
+    store = currency.RateStore("RUB", provider=flaky_provider, retry_after=3600)
+    store.ensure(["USD"], "2021-12-01", "2021-12-05")
+    store.ensure(["USD"], "2021-12-01", "2021-12-05")
+    assert len(calls) == 1
+
+    calls.clear()
+    store = currency.RateStore("RUB", provider=flaky_provider, retry_after=0)
+    store.ensure(["USD"], "2021-12-01", "2021-12-05")
+    store.ensure(["USD"], "2021-12-01", "2021-12-05")
+    assert len(calls) == 2
+    assert store.table["USD"].notna().all()
+
+
+def test_get_rate_store_offline_rates(monkeypatch):
+    def fail_get(*args, **kwargs):
+        raise AssertionError("offline store must not use the network")
+
+    monkeypatch.setattr("requests.get", fail_get)
+    settings = {"exchange_api": {"offline_rates": {"USD": 73.0}}}
+    store = currency.get_rate_store("RUB", settings)
+    assert store.path is None
+    store.ensure(["USD"], "2021-12-01", "2021-12-02")
+    assert (store.table["USD"] == 73.0).all()
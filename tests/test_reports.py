@@ -1,7 +1,77 @@
-from src import reports
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from src import currency, reports
 
 
 def test_spending_by_category_last_3_months(sample_transactions_df):
     result = reports.spending_by_category(sample_transactions_df, "Супермаркеты", "2022-01-01")
     assert isinstance(result, dict)
     assert "total_spent" in result
+
+
+def test_rolling_spending(sample_transactions_df, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    result = reports.rolling_spending(sample_transactions_df, by="Номер карты", freq="W", window=2)
+    assert result["freq"] == "W"
+    assert "*7197" in result["rolling_total"]
+    assert "*5814" in result["moving_average"]
+
+
+def test_spending_month_over_month(sample_transactions_df, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    result = reports.spending_month_over_month(sample_transactions_df)
+    months = result["months"]["Супермаркеты"]
+    assert months[0]["month"] == "2021-12"
+    assert months[0]["total"] == 160.89
+    assert months[0]["delta"] is None
+
+
+def test_save_report_concurrent_unique_files(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    @reports.save_report()
+    def make_report(i):
+        return {"value": i}
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        list(pool.map(make_report, range(50)))
+
+    files = list((tmp_path / "reports").glob("report_make_report_*.json"))
+    assert len(files) == 50
+    values = {json.loads(f.read_text(encoding="utf-8"))["value"] for f in files}
+    assert values == set(range(50))
+
+
+def test_rolling_spending_missing_column(sample_transactions_df, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assert reports.rolling_spending(sample_transactions_df, by="Нет такой колонки") == {}
+    assert reports.spending_month_over_month(sample_transactions_df, by="Нет такой колонки") == {}
+
+
+def test_spending_by_category_base_currency(sample_transactions_df, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    df = sample_transactions_df.assign(**{"Сумма операции": [-2.0, -200.0], "Валюта операции": ["USD", "RUB"]})
+    df = df.assign(**{"Валюта платежа": ["USD", "RUB"]})
+    store = currency.RateStore("RUB", provider=currency.static_rate_provider({"USD": 80.0}))
+
+    result = reports.spending_by_category(df, "Супермаркеты", "2022-01-01", base_currency="RUB", rate_store=store)
+    assert result["total_spent"] == 160.0
+    months = reports.spending_month_over_month(df, base_currency="RUB", rate_store=store)["months"]
+    assert months["Супермаркеты"][0]["total"] == 160.0
+
+
+def test_save_report_failure_leaves_no_files(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    def fail_dump(*args, **kwargs):
+        raise TypeError("fail")
+
+    monkeypatch.setattr("src.reports.json.dump", fail_dump)
+
+    @reports.save_report()
+    def make_report():
+        return {"value": 1}
+
+    assert make_report() == {"value": 1}
+    assert list((tmp_path / "reports").iterdir()) == []
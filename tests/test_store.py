@@ -0,0 +1,104 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src import services, store, utils, views
+
+
+def test_single_flight_shares_result():
+    flight = store.SingleFlight()
+    calls = []
+    gate = threading.Event()
+
+    def slow():
+        calls.append(1)
+        gate.wait(timeout=5)
+        return object()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futures = [pool.submit(flight.do, "key", slow) for _ in range(8)]
+        time.sleep(0.1)
+        gate.set()
+        results = {id(f.result()) for f in futures}
+
+    assert len(calls) == 1
+    assert len(results) == 1
+
+
+def test_single_flight_propagates_error():
+    flight = store.SingleFlight()
+
+    def fail():
+        raise ValueError("fail")
+
+    with pytest.raises(ValueError):
+        flight.do("key", fail)
+    # После ошибки ключ освобождается
+    assert flight.do("key", lambda: 42) == 42
+
+
+def test_store_reloads_on_file_change(tmp_path, sample_transactions_df):
+    path = tmp_path / "operations.xlsx"
+    path.write_text("v1")
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return sample_transactions_df
+
+    transactions = store.TransactionStore(path, loader=loader)
+    first = transactions.get()
+    assert transactions.get() is first
+    # Записи для поиска строятся лениво, один раз, и доступны только для чтения
+    assert first._records is None
+    assert len(first.records) == len(sample_transactions_df)
+    assert first.records is first.records
+    with pytest.raises(TypeError):
+        first.records[0]["Категория"] = "Другое"
+
+    path.write_text("version 2")
+    second = transactions.get()
+    assert second is not first
+    assert len(loads) == 2
+
+
+def test_concurrent_main_view_and_search(monkeypatch, sample_transactions_df):
+    loads = []
+    fetches = []
+    sorted_df = utils.sort_by_date(sample_transactions_df)
+
+    def slow_load():
+        loads.append(1)
+        time.sleep(0.05)
+        return sorted_df
+
+    def slow_rates(currencies):
+        fetches.append(1)
+        time.sleep(0.05)
+        return [{"currency": c, "rate": 1.0} for c in currencies]
+
+    monkeypatch.setattr("src.views.load_transactions_excel", slow_load)
+    monkeypatch.setattr("src.views.get_currency_rates", slow_rates)
+    monkeypatch.setattr("src.views.get_stock_prices", lambda stocks: [])
+
+    def view_call(_):
+        return json.loads(views.main_view("2021-12-31 16:44:00"))
+
+    def search_call(_):
+        records = views.transactions_store.get().records
+        return json.loads(services.simple_search("Колхоз", records))
+
+    with ThreadPoolExecutor(max_workers=32) as pool:
+        view_futures = [pool.submit(view_call, i) for i in range(200)]
+        search_futures = [pool.submit(search_call, i) for i in range(200)]
+        view_results = [f.result() for f in view_futures]
+        search_results = [f.result() for f in search_futures]
+
+    assert len(loads) == 1
+    assert views.transactions_store.get().date_index is not None
+    assert len(fetches) < len(view_results)
+    assert all(len(r["cards"]) == 2 for r in view_results)
+    assert all(len(r["results"]) == 1 for r in search_results)
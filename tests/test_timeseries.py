@@ -0,0 +1,62 @@
+import pandas as pd
+import pytest
+
+from src import timeseries
+
+
+@pytest.fixture
+def history_df():
+    data = {
+        "Дата операции": [
+            "2021-11-01 10:00:00",
+            "2021-11-03 12:00:00",
+            "2021-11-03 18:00:00",
+            "2021-12-01 09:00:00",
+            "2021-12-05 11:00:00",
+        ],
+        "Номер карты": ["*7197", "*7197", "*5814", "*5814", "*7197"],
+        "Сумма платежа": [-100.0, -50.0, 500.0, -300.0, -20.0],
+        "Категория": ["Супермаркеты", "Супермаркеты", "Переводы", "Переводы", "Супермаркеты"],
+    }
+    df = pd.DataFrame(data)
+    df["Дата операции"] = pd.to_datetime(df["Дата операции"])
+    return df
+
+
+def test_build_daily_spending(history_df):
+    daily = timeseries.build_daily_spending(history_df)
+    assert daily.index.is_monotonic_increasing
+    assert len(daily) == 35
+    assert daily.loc["2021-11-03", "Супермаркеты"] == 50.0
+    # Поступления не считаются расходами
+    assert daily.loc["2021-11-03", "Переводы"] == 0.0
+
+
+def test_window_total(history_df):
+    series = timeseries.SpendingSeries(history_df)
+    totals = series.window_total("2021-11-01", "2021-11-30")
+    assert totals["Супермаркеты"] == 150.0
+    assert totals["Переводы"] == 0.0
+    assert series.window_total("2022-01-01", "2022-02-01").sum() == 0.0
+
+
+def test_rolling_and_moving_average(history_df):
+    series = timeseries.SpendingSeries(history_df, by="Номер карты")
+    rolling = series.rolling_total("D", window=3)
+    assert rolling.loc["2021-11-03", "*7197"] == 150.0
+    assert rolling.loc["2021-11-04", "*7197"] == 50.0
+    average = series.moving_average("D", window=3)
+    assert average.loc["2021-11-01", "*7197"] == 100.0
+    assert average.loc["2021-11-03", "*7197"] == 50.0
+
+
+def test_month_over_month(history_df):
+    table = timeseries.SpendingSeries(history_df).month_over_month()
+    assert list(table[("total", "Супермаркеты")]) == [150.0, 20.0]
+    assert table.loc["2021-12-01", ("delta", "Супермаркеты")] == -130.0
+    assert pd.isna(table.loc["2021-12-01", ("pct_change", "Переводы")])
+
+
+def test_unsupported_freq(history_df):
+    with pytest.raises(ValueError):
+        timeseries.SpendingSeries(history_df).resample("Y")
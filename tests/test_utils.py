@@ -106,3 +106,38 @@ def test_top_transactions(sample_transactions_df):
     assert len(top) == 1
     t = top[0]
     assert "date" in t and "amount" in t and "category" in t and "description" in t
+
+
+def test_load_transactions_excel_sorted_by_date(tmp_path):
+    df_input = pd.DataFrame({"Дата операции": ["02.01.2023 12:00:00", "", "01.01.2023 10:00:00"]})
+    file_path = tmp_path / "ops.xlsx"
+    df_input.to_excel(file_path, index=False, engine="openpyxl")
+    df = utils.load_transactions_excel(file_path)
+    assert df["Дата операции"].iloc[0] == pd.Timestamp("2023-01-01 10:00:00")
+    assert pd.isna(df["Дата операции"].iloc[-1])
+    assert list(df.index) == [0, 1, 2]
+
+
+def test_filter_transactions_by_range_sorted(sample_transactions_df):
+    df = utils.sort_by_date(sample_transactions_df)
+    index = utils.build_date_index(df)
+    assert utils.build_date_index(sample_transactions_df) is None
+    start = datetime(2021, 12, 20, 10, 30)
+    end = datetime(2021, 12, 31)
+    assert utils.date_range_bounds(index, start, end) == (0, 1)
+    assert utils.date_range_bounds(index, start, end, include_start=False) == (1, 1)
+
+    filtered = utils.filter_transactions_by_range(df, start, datetime(2022, 1, 1), index)
+    expected = utils.filter_transactions_by_range(sample_transactions_df, start, datetime(2022, 1, 1))
+    assert sorted(filtered["Описание"]) == sorted(expected["Описание"])
+
+
+def test_filter_transactions_by_range_stale_index(sample_transactions_df):
+    df = utils.sort_by_date(sample_transactions_df)
+    index = utils.build_date_index(df)
+    # Пересортировка на месте с той же длиной: индекс дат больше не подходит, нужен полный просмотр
+    df.sort_values("Сумма платежа", ascending=False, inplace=True)
+    df.reset_index(drop=True, inplace=True)
+    assert not utils.date_index_matches(df, index)
+    filtered = utils.filter_transactions_by_range(df, datetime(2021, 12, 30), datetime(2022, 1, 1), index)
+    assert list(filtered["Описание"]) == ["Колхоз"]
@@ -0,0 +1,75 @@
+import json
+import threading
+
+import pandas as pd
+
+from src import watch
+
+
+def write_operations(path, amounts):
+    df = pd.DataFrame(
+        {
+            "Дата операции": ["20.12.2021 10:30:00", "31.12.2021 16:44:00"][: len(amounts)],
+            "Номер карты": ["*5814", "*7197"][: len(amounts)],
+            "Сумма платежа": amounts,
+            "Категория": ["Переводы", "Супермаркеты"][: len(amounts)],
+            "Описание": ["Перевод", "Колхоз"][: len(amounts)],
+        }
+    )
+    df.to_excel(path, index=False, engine="openpyxl")
+
+
+def test_poll_debounces_changes(tmp_path, monkeypatch):
+    watcher = watch.DataWatcher(data_dir=tmp_path, report_dir=tmp_path / "reports", debounce=2.0)
+    calls = []
+    monkeypatch.setattr(watcher, "recompute", lambda path: calls.append(path))
+
+    write_operations(tmp_path / "operations.xlsx", [-100.0])
+    assert watcher.poll(now=0.0) == []
+    assert watcher.poll(now=1.0) == []
+    assert watcher.poll(now=2.5) == [tmp_path / "operations.xlsx"]
+    assert watcher.wait_idle(timeout=5)
+    # Без изменений повторного пересчёта нет
+    assert watcher.poll(now=10.0) == []
+    assert calls == [tmp_path / "operations.xlsx"]
+
+
+def test_schedule_coalesces_running_recompute(tmp_path, monkeypatch):
+    watcher = watch.DataWatcher(data_dir=tmp_path, max_workers=4)
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def slow_recompute(path):
+        calls.append(path)
+        started.set()
+        release.wait(timeout=5)
+
+    monkeypatch.setattr(watcher, "recompute", slow_recompute)
+    path = tmp_path / "operations.xlsx"
+    watcher.schedule(path)
+    assert started.wait(timeout=5)
+    for _ in range(10):
+        watcher.schedule(path)
+    release.set()
+    assert watcher.wait_idle(timeout=5)
+    assert len(calls) == 2
+
+
+def test_recompute_writes_reports(tmp_path, monkeypatch):
+    # Рабочий каталог отличается от report_dir — все отчёты всё равно должны попасть в report_dir
+    monkeypatch.chdir(tmp_path)
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    write_operations(data_dir / "operations.xlsx", [-200.0, -160.89])
+
+    report_dir = tmp_path / "out"
+    watcher = watch.DataWatcher(data_dir=data_dir, report_dir=report_dir, categories=["Супермаркеты"])
+    watcher.recompute(data_dir / "operations.xlsx")
+
+    view = json.loads((report_dir / "main_view_operations.json").read_text(encoding="utf-8"))
+    assert {card["last_digits"] for card in view["cards"]} == {"5814", "7197"}
+    report_path = report_dir / "spending_by_category_operations_Супермаркеты.json"
+    report = json.loads(report_path.read_text(encoding="utf-8"))
+    assert report["total_spent"] == 160.89
+    assert not (tmp_path / "reports").exists()